@@ -38,4 +38,8 @@ tools = get_tools()
 
 agent = create_tool_calling_agent(llm, tools, prompt)
 
-agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+# Intermediate steps let the API read the tool result directly instead of
+# trusting the LLM to echo it back.
+agent_executor = AgentExecutor(
+    agent=agent, tools=tools, verbose=True, return_intermediate_steps=True
+)
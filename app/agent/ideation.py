@@ -1,8 +1,9 @@
-from langchain_ollama import ChatOllama
+from langchain_ollama import ChatOllama, OllamaEmbeddings
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from pydantic import BaseModel, Field
 from typing import List
+from app.core.semantic_cache import HashingEmbeddings, SemanticCache
 from app.core.settings import settings
 
 
@@ -47,3 +48,22 @@ prompt = ChatPromptTemplate.from_template(
 
 # --- Create the Ideation Chain ---
 ideation_chain = prompt | llm | parser
+
+# --- Create the Ideation Cache ---
+# Exact and near-duplicate ideas reuse earlier variations instead of calling
+# the LLM again, which frees the shared Ollama box for generation traffic.
+if settings.IDEATION_EMBEDDINGS == "ollama":
+    embeddings = OllamaEmbeddings(
+        model=settings.OLLAMA_EMBEDDING_MODEL, base_url=settings.OLLAMA_URL
+    )
+elif settings.IDEATION_EMBEDDINGS == "hashing":
+    embeddings = HashingEmbeddings()
+else:
+    embeddings = None
+
+ideation_cache = SemanticCache(
+    embeddings,
+    threshold=settings.IDEATION_CACHE_SIMILARITY,
+    ttl=settings.IDEATION_CACHE_TTL,
+    max_entries=settings.IDEATION_CACHE_MAX_ENTRIES,
+)
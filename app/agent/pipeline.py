@@ -0,0 +1,97 @@
+import logging
+from typing import Optional
+
+from app.agent.agent import agent_executor
+from app.agent.refiner import refinement_chain
+from app.agent.tools import ImageGeneratorInput, run_txt2img
+from app.core.artifacts import artifact_store
+from app.core.json_extract import extract_json_object
+from app.core.settings import settings
+from app.core.timing import StageTimer
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationError(Exception):
+    """Raised when a generation pipeline finishes without an image."""
+
+
+# --- Pipeline Stages ---
+def find_tool_output(agent_response: dict) -> Optional[dict]:
+    """
+    Returns the parsed result of the last `generate_image` call.
+
+    The tool observation is read from the agent's intermediate steps; the final
+    LLM output is only used as a fallback.
+    """
+    for action, observation in reversed(agent_response.get("intermediate_steps", [])):
+        if getattr(action, "tool", None) == "generate_image" and isinstance(
+            observation, str
+        ):
+            tool_output = extract_json_object(observation)
+            if tool_output:
+                return tool_output
+    return extract_json_object(
+        agent_response.get("output", ""), max_size=settings.JSON_EXTRACT_MAX_SIZE
+    )
+
+
+async def generate_with_agent(prompt: str, timer: StageTimer) -> dict:
+    """Runs the tool-calling agent and resolves the image it generated."""
+    with timer.stage("agent"):
+        agent_response = await agent_executor.ainvoke({"input": prompt})
+
+    tool_output = find_tool_output(agent_response)
+
+    if not tool_output:
+        output_str = agent_response.get("output", "")
+        logger.error(f"Could not extract JSON from agent output: {output_str}")
+        raise GenerationError("Agent returned malformed data.")
+
+    artifact = artifact_store.pop(tool_output.get("artifact_id") or "")
+
+    if not artifact:
+        error_detail = tool_output.get("error", "Agent did not return a valid image.")
+        raise GenerationError(error_detail)
+
+    return artifact
+
+
+async def generate_direct(prompt: str, timer: StageTimer) -> dict:
+    """Sends the prompt straight to A1111 without involving the LLM."""
+    with timer.stage("generate"):
+        result = await run_txt2img(ImageGeneratorInput(prompt=prompt))
+
+    if "error" in result:
+        raise GenerationError(result["error"])
+
+    return result
+
+
+async def generate_with_refiner(prompt: str, timer: StageTimer) -> dict:
+    """Refines the prompt with a single LLM call, then generates directly."""
+    with timer.stage("refine"):
+        refined = await refinement_chain.ainvoke({"user_prompt": prompt})
+
+    return await generate_direct(refined.prompt, timer)
+
+
+GENERATION_MODES = {
+    "agent": generate_with_agent,
+    "refine": generate_with_refiner,
+    "direct": generate_direct,
+}
+
+
+async def run_generation(prompt: str, mode: str = "agent") -> dict:
+    """
+    Runs one of the generation pipelines ("agent", "refine" or "direct").
+    Returns the result dict, including per-stage `timings`.
+    Raises `GenerationError`, or `GPUBusyError` when the GPU queue is saturated.
+    """
+    logger.info(f"Received prompt for generation ({mode}): {prompt}")
+    timer = StageTimer()
+    result = await GENERATION_MODES[mode](prompt, timer)
+    timings = timer.finish()
+    logger.info(f"Successfully generated image. Timings: {timings}")
+    return {**result, "timings": timings}
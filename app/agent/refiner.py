@@ -0,0 +1,54 @@
+from langchain_ollama import ChatOllama
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from pydantic import BaseModel, Field
+from app.core.settings import settings
+
+
+# --- Pydantic model for the structured output ---
+class RefinedPrompt(BaseModel):
+    """A refined prompt ready to be sent to the text-to-image model."""
+
+    prompt: str = Field(
+        description="The refined, detailed prompt for the text-to-image model."
+    )
+
+
+# --- Initialize the LLM ---
+llm = ChatOllama(
+    model=settings.OLLAMA_MODEL, temperature=0.7, base_url=settings.OLLAMA_URL
+)
+
+
+# --- Create the Prompt Templates ---
+# This mirrors the refinement step of the agent prompt, but asks for the result
+# directly instead of going through a tool call.
+system_prompt = """
+You are a creative assistant and expert prompt engineer for a text-to-image AI.
+Refine and enhance the user's prompt to be more descriptive, vivid, and suitable for a text-to-image model.
+Add artistic details, lighting, and composition suggestions, but keep the user's core creative idea.
+"""
+
+prompt = ChatPromptTemplate.from_messages(
+    [("system", system_prompt), ("human", "{user_prompt}")]
+)
+
+# Plain-text variant whose tokens can be streamed to the client as they arrive.
+text_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            system_prompt + """
+Reply with the refined prompt only. Do NOT add quotes, markdown, or explanations.
+""",
+        ),
+        ("human", "{user_prompt}"),
+    ]
+)
+
+# --- Create the Refinement Chain ---
+# A single structured-output LLM call, used by the fast path of /agent/generate.
+refinement_chain = prompt | llm.with_structured_output(RefinedPrompt)
+
+# The same refinement as plain text, used by the streaming endpoint.
+refinement_text_chain = text_prompt | llm | StrOutputParser()
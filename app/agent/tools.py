@@ -1,13 +1,16 @@
 import base64
 import json
-import requests
+import httpx
 from langchain.tools import tool
 from pathlib import Path
 import time
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from pydantic import BaseModel, Field, ValidationError
 
+from app.core.a1111 import generation_queue
+from app.core.artifacts import artifact_store
+from app.core.cache import generation_cache
 from app.core.settings import settings
 
 
@@ -31,40 +34,15 @@ class ImageGeneratorInput(BaseModel):
         default=None,
         description="The sampling method (e.g., 'Euler', 'DPM++ 2M Karras').",
     )
+    seed: Optional[int] = Field(
+        default=None,
+        description="A fixed seed for reproducible images. Leave empty for a random seed.",
+    )
 
 
-# --- Tool Definition ---
-@tool
-def generate_image(
-    prompt: str,
-    negative_prompt: Optional[str] = None,
-    steps: Optional[int] = None,
-    cfg_scale: Optional[float] = None,
-    width: Optional[int] = None,
-    height: Optional[int] = None,
-    sampler_name: Optional[str] = None,
-) -> str:
-    """
-    Generates an image from a text prompt and other parameters using the AUTOMATIC1111 API.
-    Returns a JSON string containing the image data and final prompt.
-    """
-    print("--- 🖼️ Calling Image Generation Tool ---")
-
-    try:
-
-        tool_input = ImageGeneratorInput(
-            prompt=prompt,
-            negative_prompt=negative_prompt,
-            steps=steps,
-            cfg_scale=cfg_scale,
-            width=width,
-            height=height,
-            sampler_name=sampler_name,
-        )
-        print(f"Validated Tool Input: {tool_input.model_dump_json(indent=2)}")
-    except ValidationError as e:
-        return json.dumps({"error": f"Invalid input parameters: {e}"})
-
+# --- Image Generation ---
+def build_payload(tool_input: ImageGeneratorInput) -> dict:
+    """Builds the A1111 txt2img payload, filling in the FAST_MODE defaults."""
     # --- Set Image Quality Defaults based on FAST_MODE ---
     if settings.FAST_MODE:
         default_steps = 1
@@ -78,7 +56,7 @@ def generate_image(
         default_height = 1024
 
     # --- API Payload ---
-    payload = {
+    return {
         "prompt": tool_input.prompt,
         "negative_prompt": tool_input.negative_prompt,
         "steps": tool_input.steps or default_steps,
@@ -86,44 +64,166 @@ def generate_image(
         "width": tool_input.width or default_width,
         "height": tool_input.height or default_height,
         "sampler_name": tool_input.sampler_name or default_sampler,
+        "seed": tool_input.seed if tool_input.seed is not None else -1,
     }
 
+
+def save_image(
+    image_data: str, final_prompt: str, cache_key: Optional[str] = None
+) -> dict:
+    """
+    Decodes a base64 image from A1111, writes it to OUTPUT_DIR and returns the result dict.
+    The image ID is the file name, which `/images/{image_id}` serves.
+    If a `cache_key` is given, the image is also added to the generation cache.
+    """
+    image_bytes = base64.b64decode(image_data)
+
+    output_path = Path(settings.OUTPUT_DIR)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    # Nanoseconds, so images from the same batch don't overwrite each other.
+    timestamp = time.time_ns()
+    file_path = output_path / f"generated_image_{timestamp}.png"
+
+    with open(file_path, "wb") as f:
+        f.write(image_bytes)
+    print(f"Image saved to: {file_path}")
+
+    if cache_key:
+        generation_cache.put(cache_key, image_bytes, source_path=file_path)
+
+    return {
+        "image_id": file_path.stem,
+        "final_prompt": final_prompt,
+        "saved_path": str(file_path),
+    }
+
+
+def cached_result(cache_key: str, final_prompt: str) -> dict:
+    """Builds the result dict for an image served from the generation cache."""
+    return {
+        "image_id": cache_key,
+        "final_prompt": final_prompt,
+        "saved_path": str(generation_cache.path_for(cache_key)),
+    }
+
+
+async def run_txt2img(tool_input: ImageGeneratorInput) -> dict:
+    """
+    Calls the A1111 txt2img API through the GPU job queue and saves the first image to OUTPUT_DIR.
+    Returns a dict with the image ID, final prompt and saved path, or an "error" key.
+    Raises `GPUBusyError` when the queue is saturated, so the API can reject the request.
+    """
+    payload = build_payload(tool_input)
+
+    # --- Check the Generation Cache ---
+    cache_key = generation_cache.key_for(payload)
+    if cache_key:
+        if generation_cache.get(cache_key) is not None:
+            print(f"Generation cache hit: {cache_key}")
+            return cached_result(cache_key, payload["prompt"])
+
     # --- Make the API Request ---
     try:
-        response = requests.post(
-            url=f"{settings.A1111_URL}/sdapi/v1/txt2img", json=payload, timeout=180
-        )
-        response.raise_for_status()
-        r = response.json()
-    except requests.exceptions.RequestException as e:
+        r = await generation_queue.submit(payload)
+    except httpx.HTTPError as e:
         print(f"Error calling A1111 API: {e}")
-        error_result = {"error": "Failed to connect to the image generation server."}
-        return json.dumps(error_result)
+        return {"error": "Failed to connect to the image generation server."}
 
     if "images" in r and r["images"]:
-        image_data = r["images"][0]
-        image_bytes = base64.b64decode(image_data)
+        return save_image(r["images"][0], payload["prompt"], cache_key)
+    else:
+        print("API response did not contain image data.")
+        return {"error": "The image generation server did not return an image."}
 
-        output_path = Path(settings.OUTPUT_DIR)
-        output_path.mkdir(parents=True, exist_ok=True)
 
-        timestamp = int(time.time())
-        file_path = output_path / f"generated_image_{timestamp}.png"
+# --- Batching ---
+# The built-in A1111 script that runs one prompt per line in a single request.
+PROMPTS_SCRIPT = "prompts from file or textbox"
+
+
+def batch_key(payload: dict) -> tuple:
+    """Returns the settings that must match for payloads to share an A1111 request."""
+    return tuple(sorted((k, v) for k, v in payload.items() if k != "prompt"))
+
+
+def build_batches(
+    payloads: List[dict], max_batch_size: int
+) -> List[Tuple[List[int], dict]]:
+    """
+    Groups payloads with compatible settings (size, steps, sampler, ...) into
+    batched A1111 requests. Returns `(indices, batch_payload)` pairs, where the
+    images of `batch_payload` come back in the order of `indices`.
+
+    Identical prompts with a random seed use `batch_size`; everything else is
+    sent one prompt per line through the "prompts from file or textbox" script.
+    """
+    groups: Dict[tuple, List[int]] = {}
+    for index, payload in enumerate(payloads):
+        groups.setdefault(batch_key(payload), []).append(index)
+
+    batches = []
+    for indices in groups.values():
+        for start in range(0, len(indices), max_batch_size):
+            chunk = indices[start : start + max_batch_size]
+            prompts = [payloads[i]["prompt"] for i in chunk]
+            # Grids would be returned as an extra first image.
+            batch_payload = dict(payloads[chunk[0]], do_not_save_grid=True)
+            # batch_size increments the seed per image, so only use it for random seeds.
+            if len(set(prompts)) == 1 and batch_payload.get("seed", -1) < 0:
+                batch_payload["batch_size"] = len(chunk)
+            else:
+                # One prompt per line, so collapse any whitespace inside a prompt.
+                lines = "\n".join(" ".join(p.split()) for p in prompts)
+                batch_payload["script_name"] = PROMPTS_SCRIPT
+                batch_payload["script_args"] = [False, False, "start", lines]
+            batches.append((chunk, batch_payload))
+    return batches
 
-        with open(file_path, "wb") as f:
-            f.write(image_bytes)
-        print(f"Image saved to: {file_path}")
 
-        result = {
-            "image_base64": image_data,
-            "final_prompt": payload["prompt"],
-            "saved_path": str(file_path),
-        }
+# --- Tool Definition ---
+@tool
+async def generate_image(
+    prompt: str,
+    negative_prompt: Optional[str] = None,
+    steps: Optional[int] = None,
+    cfg_scale: Optional[float] = None,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    sampler_name: Optional[str] = None,
+    seed: Optional[int] = None,
+) -> str:
+    """
+    Generates an image from a text prompt and other parameters using the AUTOMATIC1111 API.
+    Returns a JSON string containing an artifact handle for the image and the final prompt.
+    """
+    print("--- 🖼️ Calling Image Generation Tool ---")
+
+    try:
+
+        tool_input = ImageGeneratorInput(
+            prompt=prompt,
+            negative_prompt=negative_prompt,
+            steps=steps,
+            cfg_scale=cfg_scale,
+            width=width,
+            height=height,
+            sampler_name=sampler_name,
+            seed=seed,
+        )
+        print(f"Validated Tool Input: {tool_input.model_dump_json(indent=2)}")
+    except ValidationError as e:
+        return json.dumps({"error": f"Invalid input parameters: {e}"})
+
+    result = await run_txt2img(tool_input)
+    if "error" in result:
         return json.dumps(result)
-    else:
-        print("API response did not contain image data.")
-        error_result = {"error": "The image generation server did not return an image."}
-        return json.dumps(error_result)
+
+    # Keep the image out of the LLM context: store it and return a handle.
+    artifact_id = artifact_store.put(result)
+    return json.dumps(
+        {"artifact_id": artifact_id, "final_prompt": result["final_prompt"]}
+    )
 
 
 def get_tools():
@@ -0,0 +1,178 @@
+import base64
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional, Tuple
+
+import anyio
+from fastapi import APIRouter, HTTPException, Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.settings import settings
+
+# --- Router and Logger Setup ---
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+IMAGE_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+# Image files never change once written, so clients may cache them for a year.
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+# --- Helper Functions ---
+def image_url(image_id: str) -> str:
+    """Returns the API path that serves an image."""
+    return f"/images/{image_id}"
+
+
+def resolve_image_path(image_id: str) -> Optional[Path]:
+    """Finds the PNG for an image ID in OUTPUT_DIR or its cache directory."""
+    if not IMAGE_ID_PATTERN.match(image_id):
+        return None
+    output_path = Path(settings.OUTPUT_DIR)
+    for directory in (output_path, output_path / "cache"):
+        path = directory / f"{image_id}.png"
+        if path.is_file():
+            return path
+    return None
+
+
+def load_image_base64(image_id: str) -> Optional[str]:
+    """Reads an image back as base64, for clients that opt in to inline images."""
+    path = resolve_image_path(image_id)
+    if path is None:
+        return None
+    return base64.b64encode(path.read_bytes()).decode("ascii")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parses a single `bytes=start-end` range into inclusive offsets.
+    Returns None for ranges that can't be satisfied; multiple ranges aren't supported.
+    """
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or size == 0:
+        return None
+    start, end = match.groups()
+    if start:
+        first = int(start)
+        last = min(int(end), size - 1) if end else size - 1
+    elif end:
+        # A suffix range: the last N bytes.
+        first = max(size - int(end), 0)
+        last = size - 1
+    else:
+        return None
+    if first > last or first >= size:
+        return None
+    return first, last
+
+
+# --- Responses ---
+class ImageFileResponse(FileResponse):
+    """
+    A `FileResponse` that can serve a single byte range, and that hands the
+    file to the server with the ASGI `http.response.zerocopysend` extension
+    (i.e. sendfile) when the server supports it.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        stat_result: os.stat_result,
+        byte_range: Optional[Tuple[int, int]] = None,
+        **kwargs,
+    ):
+        super().__init__(path, stat_result=stat_result, **kwargs)
+        size = stat_result.st_size
+        self.byte_range = byte_range or (0, size - 1)
+        if byte_range is not None:
+            self.status_code = 206
+            first, last = byte_range
+            self.headers["content-range"] = f"bytes {first}-{last}/{size}"
+            self.headers["content-length"] = str(last - first + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        first, last = self.byte_range
+        count = last - first + 1
+        if scope["method"].upper() == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send(
+                    {
+                        "type": "http.response.zerocopysend",
+                        "file": file,
+                        "offset": first,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(first)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    remaining -= len(chunk)
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": chunk,
+                            "more_body": remaining > 0 and bool(chunk),
+                        }
+                    )
+                    if not chunk:
+                        break
+
+
+# --- API Endpoints ---
+@router.get("/images/{image_id}", tags=["Images"])
+async def get_image(image_id: str, request: Request):
+    """
+    Serves a generated PNG with ETag, Range and long-lived cache headers.
+    """
+    path = resolve_image_path(image_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found.")
+
+    stat_result = await anyio.to_thread.run_sync(os.stat, path)
+    headers = {"cache-control": CACHE_CONTROL, "accept-ranges": "bytes"}
+    response = ImageFileResponse(
+        path, stat_result=stat_result, headers=headers, media_type="image/png"
+    )
+    etag = response.headers["etag"]
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers={**headers, "etag": etag})
+
+    range_header = request.headers.get("range")
+    if range_header:
+        # Only honour the range if the client's copy is still current.
+        if_range = request.headers.get("if-range")
+        if not if_range or if_range == etag:
+            byte_range = parse_range(range_header, stat_result.st_size)
+            if byte_range is None:
+                return Response(
+                    status_code=416,
+                    headers={"content-range": f"bytes */{stat_result.st_size}"},
+                )
+            response = ImageFileResponse(
+                path,
+                stat_result=stat_result,
+                byte_range=byte_range,
+                headers=headers,
+                media_type="image/png",
+            )
+    return response
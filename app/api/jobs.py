@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
+
+from app.agent.pipeline import run_generation
+from app.api.images import image_url
+from app.core.jobs import JobRunner, job_store
+from app.core.settings import settings
+
+# --- Router and Logger Setup ---
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+# --- Pydantic Models ---
+class JobRequest(BaseModel):
+    prompt: str
+    mode: Literal["agent", "refine", "direct"] = "agent"
+
+
+class JobResult(BaseModel):
+    image_id: str
+    image_url: str
+    final_prompt: str
+    timings: dict = {}
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # Seconds between submission and a worker picking the job up.
+    queue_wait: Optional[float] = None
+    result: Optional[JobResult] = None
+    error: Optional[str] = None
+
+
+# --- Job Handler ---
+async def run_job(request: dict) -> dict:
+    """Runs a generation job and returns the JSON-serializable result."""
+    result = await run_generation(request["prompt"], request.get("mode", "agent"))
+    return {
+        "image_id": result["image_id"],
+        "image_url": image_url(result["image_id"]),
+        "final_prompt": result["final_prompt"],
+        "timings": result["timings"],
+    }
+
+
+job_runner = JobRunner(
+    job_store,
+    run_job,
+    concurrency=settings.JOBS_CONCURRENCY,
+    poll_interval=settings.JOBS_POLL_INTERVAL,
+)
+
+
+def job_response(job: dict) -> JobResponse:
+    queue_wait = None
+    if job["started_at"] is not None:
+        queue_wait = round(job["started_at"] - job["created_at"], 4)
+    return JobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        queue_wait=queue_wait,
+        result=job["result"],
+        error=job["error"],
+    )
+
+
+# --- API Endpoints ---
+@router.post("/jobs", response_model=JobResponse, status_code=202, tags=["Jobs"])
+async def create_job(request: JobRequest):
+    """
+    Queue a generation and return immediately. Poll `GET /jobs/{job_id}`
+    for the result.
+    """
+    job = await job_runner.submit(request.model_dump())
+    logger.info(f"Queued job {job['id']} ({request.mode}): {request.prompt}")
+    return job_response(job)
+
+
+@router.get("/jobs/metrics", tags=["Jobs"])
+async def job_metrics():
+    """Returns job counts by status and queue-wait statistics."""
+    return await asyncio.to_thread(job_store.metrics)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse, tags=["Jobs"])
+async def get_job(job_id: str):
+    """Returns a job's status, and its result once it has succeeded."""
+    job = await asyncio.to_thread(job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job_response(job)
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=JobResponse, tags=["Jobs"])
+async def cancel_job(job_id: str):
+    """Cancels a queued or running job. Finished jobs are left unchanged."""
+    job = await job_runner.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job_response(job)
@@ -1,13 +1,26 @@
+import asyncio
 import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Dict, Literal, Optional, List, Union
 import json
-import base64
-import re
 
-from app.agent.agent import agent_executor
-from app.agent.ideation import ideation_chain
+from app.agent.ideation import ideation_cache, ideation_chain
+from app.agent.pipeline import run_generation
+from app.agent.refiner import refinement_text_chain
+from app.agent.tools import (
+    ImageGeneratorInput,
+    build_batches,
+    build_payload,
+    cached_result,
+    save_image,
+)
+from app.api.images import image_url, load_image_base64
+from app.core.a1111 import GPUBusyError, QueueTimeoutError, generation_queue
+from app.core.cache import generation_cache
+from app.core.settings import settings
+from app.core.timing import StageTimer
 
 # --- Router and Logger Setup ---
 router = APIRouter()
@@ -17,15 +30,52 @@ logger = logging.getLogger(__name__)
 # --- Pydantic Models ---
 class GenerationRequest(BaseModel):
     prompt: str
+    # Set to False to skip the ideation cache and always ask the LLM.
+    use_cache: bool = True
 
 
 class AgentGenerateRequest(BaseModel):
     prompt: str
+    # "agent": full tool-calling agent loop.
+    # "refine": a single structured LLM call refines the prompt, then A1111 is called directly.
+    # "direct": no LLM at all, e.g. for prompts that already came from /agent/variations.
+    mode: Literal["agent", "refine", "direct"] = "agent"
+    # Images are served from /images/{image_id}; set to True to also get them inline.
+    include_base64: bool = False
 
 
 class AgentGenerateResponse(BaseModel):
-    image_base64: str
+    image_id: str
+    image_url: str
     final_prompt: str
+    image_base64: Optional[str] = None
+    # Per-stage wall-clock durations in seconds, plus the "total".
+    timings: Dict[str, float] = {}
+
+
+class StreamGenerateRequest(BaseModel):
+    prompt: str
+    # "refine" streams the refinement tokens first; "direct" skips the LLM.
+    mode: Literal["refine", "direct"] = "refine"
+    seed: Optional[int] = None
+    include_base64: bool = False
+
+
+class BatchGenerateRequest(BaseModel):
+    # Plain prompts use the default settings; objects can override them per prompt.
+    prompts: List[Union[str, ImageGeneratorInput]]
+    include_base64: bool = False
+
+
+class BatchImageResult(BaseModel):
+    """One line of the NDJSON stream returned by /agent/generate_batch."""
+
+    index: int
+    final_prompt: str
+    image_id: Optional[str] = None
+    image_url: Optional[str] = None
+    image_base64: Optional[str] = None
+    error: Optional[str] = None
 
 
 class VariationsResponse(BaseModel):
@@ -33,18 +83,27 @@ class VariationsResponse(BaseModel):
 
 
 # --- Helper Functions ---
-def extract_json_from_string(text: str) -> Optional[dict]:
-    """
-    Finds and parses the first valid JSON object within a string.
-    """
-    # This regex finds a JSON object by looking for the outermost curly braces
-    match = re.search(r"\{.*\}", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            return None
-    return None
+def gpu_busy_exception(error: GPUBusyError) -> HTTPException:
+    """Builds the 503 returned when the GPU job queue is saturated."""
+    return HTTPException(
+        status_code=503, detail=str(error), headers={"Retry-After": "5"}
+    )
+
+
+def image_fields(result: dict, include_base64: bool) -> dict:
+    """Returns the image reference fields of a response for a generation result."""
+    fields = {
+        "image_id": result["image_id"],
+        "image_url": image_url(result["image_id"]),
+    }
+    if include_base64:
+        fields["image_base64"] = load_image_base64(result["image_id"])
+    return fields
+
+
+def sse_event(event: str, data: dict) -> str:
+    """Formats a single Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
 
 # --- API Endpoints ---
@@ -57,38 +116,242 @@ def ping():
 @router.post("/agent/generate", response_model=AgentGenerateResponse)
 async def agent_generate(request: AgentGenerateRequest):
     """
-    Generate an image using the agentic executor.
+    Generate an image using the agentic executor, or one of the faster modes
+    that skip the agent loop.
     """
     try:
-        logger.info(f"Agent received prompt for generation: {request.prompt}")
-        agent_response = await agent_executor.ainvoke({"input": request.prompt})
+        result = await run_generation(request.prompt, request.mode)
+        return AgentGenerateResponse(
+            **image_fields(result, request.include_base64),
+            final_prompt=result["final_prompt"],
+            timings=result["timings"],
+        )
+
+    except HTTPException:
+        raise
+    except GPUBusyError as e:
+        logger.warning(f"Rejected /agent/generate, GPU is busy: {e}")
+        raise gpu_busy_exception(e)
+    except Exception as e:
+        logger.error(f"An unexpected error occurred in /agent/generate: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
 
-        output_str = agent_response.get("output", "")
-        tool_output = extract_json_from_string(output_str)
 
-        if not tool_output:
-            logger.error(f"Could not extract JSON from agent output: {output_str}")
-            raise HTTPException(
-                status_code=500, detail="Agent returned malformed data."
+@router.post("/agent/generate/stream")
+async def agent_generate_stream(request: StreamGenerateRequest):
+    """
+    Generate an image and stream progress as Server-Sent Events:
+    `token` (refinement text as the LLM produces it), `prompt` (the final prompt),
+    `queued` / `started` (the A1111 job), `progress` (polled from A1111, with a
+    preview image), and finally `done` with the image, or `error`.
+    """
+
+    async def events():
+        timer = StageTimer()
+        job = None
+        try:
+            final_prompt = request.prompt
+            if request.mode == "refine":
+                tokens = []
+                with timer.stage("refine"):
+                    async for token in refinement_text_chain.astream(
+                        {"user_prompt": request.prompt}
+                    ):
+                        tokens.append(token)
+                        yield sse_event("token", {"text": token})
+                final_prompt = "".join(tokens).strip().strip('"') or request.prompt
+            yield sse_event("prompt", {"final_prompt": final_prompt})
+
+            payload = build_payload(
+                ImageGeneratorInput(prompt=final_prompt, seed=request.seed)
             )
+            cache_key = generation_cache.key_for(payload)
+            image_bytes = generation_cache.get(cache_key) if cache_key else None
+
+            if image_bytes is not None:
+                result = cached_result(cache_key, final_prompt)
+            else:
+                job = await generation_queue.enqueue(payload)
+                yield sse_event("queued", {"queue_depth": generation_queue.depth})
+                deadline = asyncio.get_running_loop().time() + generation_queue.timeout
 
-        image_base64 = tool_output.get("image_base64")
-        final_prompt = tool_output.get("final_prompt")
+                with timer.stage("queue"):
+                    started = asyncio.ensure_future(job.started.wait())
+                    try:
+                        await asyncio.wait(
+                            [started, job.future],
+                            timeout=generation_queue.timeout,
+                            return_when=asyncio.FIRST_COMPLETED,
+                        )
+                    finally:
+                        started.cancel()
+                yield sse_event("started", {})
 
-        if not image_base64:
-            error_detail = tool_output.get(
-                "error", "Agent did not return a valid image."
+                with timer.stage("generate"):
+                    while not job.future.done():
+                        if asyncio.get_running_loop().time() > deadline:
+                            raise QueueTimeoutError(
+                                f"Image generation did not finish within "
+                                f"{generation_queue.timeout:.0f}s."
+                            )
+                        await asyncio.wait(
+                            [job.future], timeout=settings.A1111_PROGRESS_INTERVAL
+                        )
+                        if job.future.done():
+                            break
+                        try:
+                            progress = await generation_queue.client.progress()
+                        except Exception as e:
+                            logger.warning(f"Could not poll A1111 progress: {e}")
+                            continue
+                        yield sse_event(
+                            "progress",
+                            {
+                                "progress": progress.get("progress"),
+                                "eta_relative": progress.get("eta_relative"),
+                                "current_image": progress.get("current_image"),
+                            },
+                        )
+                    images = job.future.result().get("images") or []
+
+                if not images:
+                    raise HTTPException(
+                        status_code=500,
+                        detail="The image generation server did not return an image.",
+                    )
+                result = save_image(images[0], final_prompt, cache_key)
+
+            yield sse_event(
+                "done",
+                {
+                    **image_fields(result, request.include_base64),
+                    "final_prompt": result["final_prompt"],
+                    "timings": timer.finish(),
+                },
             )
-            raise HTTPException(status_code=500, detail=error_detail)
+        except GPUBusyError as e:
+            logger.warning(f"Rejected /agent/generate/stream, GPU is busy: {e}")
+            yield sse_event("error", {"status_code": 503, "detail": str(e)})
+        except HTTPException as e:
+            yield sse_event("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception(f"An unexpected error occurred in the stream: {e}")
+            yield sse_event("error", {"status_code": 500, "detail": str(e)})
+        finally:
+            # Don't run, or keep waiting on, a job nobody will receive.
+            if job is not None:
+                job.future.cancel()
 
-        logger.info("Agent successfully generated image.")
-        return AgentGenerateResponse(
-            image_base64=image_base64, final_prompt=final_prompt
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/agent/generate_batch")
+async def agent_generate_batch(request: BatchGenerateRequest):
+    """
+    Generate many prompts at once, without the LLM. Prompts with compatible
+    settings share a single A1111 request, and each image is streamed back as
+    an NDJSON line (`BatchImageResult`) as soon as its request completes.
+    """
+    inputs = [
+        ImageGeneratorInput(prompt=p) if isinstance(p, str) else p
+        for p in request.prompts
+    ]
+    payloads = [build_payload(tool_input) for tool_input in inputs]
+
+    # Fixed-seed prompts that were generated before are served from the cache.
+    cache_keys = [generation_cache.key_for(payload) for payload in payloads]
+    cached = {}
+    for index, cache_key in enumerate(cache_keys):
+        if cache_key:
+            image_bytes = generation_cache.get(cache_key)
+            if image_bytes is not None:
+                cached[index] = cached_result(cache_key, payloads[index]["prompt"])
+
+    misses = [index for index in range(len(payloads)) if index not in cached]
+    batches = [
+        ([misses[i] for i in indices], payload)
+        for indices, payload in build_batches(
+            [payloads[index] for index in misses], settings.A1111_MAX_BATCH_SIZE
         )
+    ]
+    logger.info(
+        f"Batching {len(misses)} prompts into {len(batches)} requests "
+        f"({len(cached)} served from cache)."
+    )
 
-    except Exception as e:
-        logger.error(f"An unexpected error occurred in /agent/generate: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    # Queue every batch up front, so a saturated GPU is still reported as a 503.
+    jobs = []
+    try:
+        for indices, payload in batches:
+            jobs.append((indices, await generation_queue.enqueue(payload)))
+    except GPUBusyError as e:
+        for _, job in jobs:
+            job.future.cancel()
+        logger.warning(f"Rejected /agent/generate_batch, GPU is busy: {e}")
+        raise gpu_busy_exception(e)
+
+    async def stream_results():
+        for index, result in cached.items():
+            line = BatchImageResult(
+                index=index,
+                final_prompt=result["final_prompt"],
+                **image_fields(result, request.include_base64),
+            )
+            yield line.model_dump_json() + "\n"
+
+        pending = {
+            asyncio.ensure_future(generation_queue.wait(job)): indices
+            for indices, job in jobs
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    indices = pending.pop(task)
+                    try:
+                        images = task.result().get("images") or []
+                        error = None
+                    except Exception as e:
+                        logger.error(f"Batch request failed: {e}")
+                        images, error = [], str(e) or type(e).__name__
+                    for n, index in enumerate(indices):
+                        final_prompt = payloads[index]["prompt"]
+                        if n < len(images):
+                            result = save_image(
+                                images[n], final_prompt, cache_keys[index]
+                            )
+                            line = BatchImageResult(
+                                index=index,
+                                final_prompt=final_prompt,
+                                **image_fields(result, request.include_base64),
+                            )
+                        else:
+                            line = BatchImageResult(
+                                index=index,
+                                final_prompt=final_prompt,
+                                error=error or "No image was returned.",
+                            )
+                        yield line.model_dump_json() + "\n"
+        finally:
+            # The client went away: don't keep the GPU busy for nobody.
+            for task in pending:
+                task.cancel()
+            for _, job in jobs:
+                job.future.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.get("/cache/stats")
+def cache_stats():
+    """Returns hit/miss counters and sizes of the generation and ideation caches."""
+    return {**generation_cache.stats(), "ideation": ideation_cache.stats()}
 
 
 @router.post("/agent/variations", response_model=VariationsResponse)
@@ -97,7 +360,11 @@ async def agent_variations(request: GenerationRequest):
     Receives a simple prompt and generates a list of creative variations using the ideation agent.
     """
     try:
-        response_dict = await ideation_chain.ainvoke({"user_idea": request.prompt})
+        response_dict = await ideation_cache.get_or_compute(
+            request.prompt,
+            lambda: ideation_chain.ainvoke({"user_idea": request.prompt}),
+            use_cache=request.use_cache,
+        )
         return VariationsResponse(variations=response_dict.get("variations", []))
     except Exception as e:
         logger.exception("An unexpected error occurred in /agent/variations: %s", e)
@@ -0,0 +1,212 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import httpx
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+# --- Exceptions ---
+class GPUBusyError(Exception):
+    """Raised when the GPU job queue cannot take or finish a job in time."""
+
+
+class QueueFullError(GPUBusyError):
+    """Raised when the GPU job queue is at its maximum depth."""
+
+
+class QueueTimeoutError(GPUBusyError):
+    """Raised when a job did not finish within the queue timeout."""
+
+
+# --- HTTP Client ---
+class A1111Client:
+    """
+    A pooled, keep-alive async client for the AUTOMATIC1111 API.
+
+    A single instance is shared for the whole app lifetime. The underlying
+    `httpx.AsyncClient` is created lazily and re-created if it is used from a
+    different event loop (e.g. in tests).
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        timeout: float = 180.0,
+        max_connections: int = 8,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.timeout, connect=10.0),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self.transport,
+            )
+            self._loop = loop
+        return self._client
+
+    async def start(self):
+        """Opens the connection pool."""
+        self.client
+
+    async def close(self):
+        """Closes the connection pool."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def txt2img(self, payload: dict) -> dict:
+        """Calls `/sdapi/v1/txt2img` and returns the decoded JSON response."""
+        response = await self.client.post("/sdapi/v1/txt2img", json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def progress(self) -> dict:
+        """Calls `/sdapi/v1/progress`, including the current preview image."""
+        response = await self.client.get(
+            "/sdapi/v1/progress", params={"skip_current_image": "false"}
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+# --- GPU Job Queue ---
+@dataclass
+class GenerationJob:
+    """A single txt2img request waiting for, or running on, the GPU."""
+
+    payload: dict
+    future: asyncio.Future
+    started: asyncio.Event = field(default_factory=asyncio.Event)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    started_at: Optional[float] = None
+
+
+class GenerationQueue:
+    """
+    A bounded asyncio job queue in front of the A1111 server.
+
+    At most `concurrency` txt2img calls run at once and at most `max_depth`
+    jobs wait behind them. When the queue is full, callers fail fast with
+    `QueueFullError` instead of piling up behind a saturated GPU.
+    """
+
+    def __init__(
+        self,
+        client: A1111Client,
+        concurrency: int = 1,
+        max_depth: int = 16,
+        timeout: float = 300.0,
+    ):
+        self.client = client
+        self.concurrency = concurrency
+        self.max_depth = max_depth
+        self.timeout = timeout
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def start(self):
+        """Starts the worker tasks on the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_depth)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        self._loop = loop
+
+    async def stop(self):
+        """Cancels the worker tasks."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._loop = None
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs waiting for a free worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def enqueue(self, payload: dict) -> GenerationJob:
+        """Adds a job to the queue without waiting for it to run."""
+        await self.start()
+        job = GenerationJob(
+            payload=payload, future=asyncio.get_running_loop().create_future()
+        )
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(
+                f"The image generation queue is full ({self.max_depth} jobs waiting)."
+            )
+        return job
+
+    async def wait(self, job: GenerationJob) -> dict:
+        """Waits for a job's result, cancelling it after the queue timeout."""
+        try:
+            return await asyncio.wait_for(job.future, timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise QueueTimeoutError(
+                f"Image generation did not finish within {self.timeout:.0f}s."
+            )
+
+    async def submit(self, payload: dict) -> dict:
+        """Queues a txt2img call and returns the A1111 response."""
+        return await self.wait(await self.enqueue(payload))
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.future.done():
+                    # The caller gave up while the job was waiting.
+                    continue
+                job.started_at = time.perf_counter()
+                job.started.set()
+                result = await self.client.txt2img(job.payload)
+                if not job.future.done():
+                    job.future.set_result(result)
+            except asyncio.CancelledError:
+                if not job.future.done():
+                    job.future.cancel()
+                raise
+            except Exception as e:
+                if not job.future.done():
+                    job.future.set_exception(e)
+            finally:
+                self._queue.task_done()
+
+
+a1111_client = A1111Client(
+    settings.A1111_URL,
+    timeout=settings.A1111_REQUEST_TIMEOUT,
+    max_connections=settings.A1111_MAX_CONNECTIONS,
+)
+generation_queue = GenerationQueue(
+    a1111_client,
+    concurrency=settings.A1111_CONCURRENCY,
+    max_depth=settings.A1111_QUEUE_DEPTH,
+    timeout=settings.A1111_QUEUE_TIMEOUT,
+)
@@ -0,0 +1,49 @@
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.core.settings import settings
+
+
+class ArtifactStore:
+    """
+    A bounded, in-process store for large tool results.
+
+    Tools save their full result here and hand the LLM only a short handle, so
+    image data never travels through the model context. The API resolves the
+    handle directly once the agent is done.
+    """
+
+    def __init__(self, max_items: int = 256):
+        self.max_items = max_items
+        self._items: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Tools may run on worker threads, so guard the dict with a lock.
+        self._lock = threading.Lock()
+
+    def put(self, artifact: Dict[str, Any]) -> str:
+        """Stores an artifact and returns its handle."""
+        artifact_id = uuid.uuid4().hex
+        with self._lock:
+            self._items[artifact_id] = artifact
+            # Drop the oldest artifacts that were never collected.
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+        return artifact_id
+
+    def get(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        """Returns an artifact without removing it."""
+        with self._lock:
+            return self._items.get(artifact_id)
+
+    def pop(self, artifact_id: str) -> Optional[Dict[str, Any]]:
+        """Returns an artifact and removes it from the store."""
+        with self._lock:
+            return self._items.pop(artifact_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+artifact_store = ArtifactStore(max_items=settings.ARTIFACT_STORE_MAX_ITEMS)
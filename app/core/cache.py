@@ -0,0 +1,169 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationCache:
+    """
+    A content-addressed cache of generated PNGs.
+
+    Entries are keyed by a hash of the normalized txt2img payload, which must
+    include an explicit seed; random-seed payloads are never cached. A small
+    in-memory LRU tier sits in front of a disk tier under OUTPUT_DIR, and both
+    are bounded by total size in bytes.
+    """
+
+    def __init__(self, directory: str, max_memory_bytes: int, max_disk_bytes: int):
+        self.directory = Path(directory)
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # key -> file size, oldest first. Loaded lazily from the directory.
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters: Dict[str, int] = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+        }
+
+    # --- Keys ---
+    @staticmethod
+    def key_for(payload: dict) -> Optional[str]:
+        """Returns the cache key for a payload, or None if its seed is random."""
+        seed = payload.get("seed")
+        if seed is None or seed < 0:
+            return None
+        normalized = {
+            k: " ".join(v.split()) if isinstance(v, str) else v
+            for k, v in payload.items()
+            if v is not None
+        }
+        encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def path_for(self, key: str) -> Path:
+        return self.directory / f"{key}.png"
+
+    # --- Lookups ---
+    def get(self, key: str) -> Optional[bytes]:
+        """Returns the cached PNG bytes for a key, or None on a miss."""
+        with self._lock:
+            image_bytes = self._memory.get(key)
+            if image_bytes is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return image_bytes
+
+            disk = self._load_disk_index()
+            if key in disk:
+                try:
+                    image_bytes = self.path_for(key).read_bytes()
+                except OSError:
+                    self._disk_bytes -= disk.pop(key)
+                else:
+                    disk.move_to_end(key)
+                    self._remember(key, image_bytes)
+                    self.counters["disk_hits"] += 1
+                    return image_bytes
+
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, key: str, image_bytes: bytes, source_path: Optional[Path] = None):
+        """
+        Stores a PNG in both tiers. If `source_path` already holds the same
+        bytes, the disk tier hard-links to it instead of writing a copy.
+        """
+        with self._lock:
+            self._remember(key, image_bytes)
+
+            disk = self._load_disk_index()
+            if key in disk:
+                disk.move_to_end(key)
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.path_for(key)
+            try:
+                if source_path is None:
+                    raise OSError("No source file to link.")
+                os.link(source_path, path)
+            except OSError:
+                try:
+                    path.write_bytes(image_bytes)
+                except OSError as e:
+                    logger.warning(f"Could not write cache entry {path}: {e}")
+                    return
+            disk[key] = len(image_bytes)
+            self._disk_bytes += len(image_bytes)
+            self._evict_disk()
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters and the current size of each tier."""
+        with self._lock:
+            disk = self._load_disk_index()
+            return {
+                **self.counters,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_entries": len(disk),
+                "disk_bytes": self._disk_bytes,
+            }
+
+    # --- Internals (call with the lock held) ---
+    def _remember(self, key: str, image_bytes: bytes):
+        if len(image_bytes) > self.max_memory_bytes:
+            return
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = image_bytes
+        self._memory_bytes += len(image_bytes)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        disk = self._disk
+        while self._disk_bytes > self.max_disk_bytes and disk:
+            key, size = disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.counters["evictions"] += 1
+            try:
+                self.path_for(key).unlink()
+            except OSError:
+                pass
+
+    def _load_disk_index(self) -> "OrderedDict[str, int]":
+        if self._disk is None:
+            entries = []
+            if self.directory.is_dir():
+                for path in self.directory.glob("*.png"):
+                    try:
+                        stat = path.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, path.stem, stat.st_size))
+            entries.sort()
+            self._disk = OrderedDict((key, size) for _, key, size in entries)
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+
+generation_cache = GenerationCache(
+    os.path.join(settings.OUTPUT_DIR, "cache"),
+    max_memory_bytes=settings.GENERATION_CACHE_MEMORY_BYTES,
+    max_disk_bytes=settings.GENERATION_CACHE_DISK_BYTES,
+)
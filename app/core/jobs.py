@@ -0,0 +1,284 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import closing
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from app.core.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Job states. "queued" and "running" are active; the rest are final.
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+"""
+
+
+class JobStore:
+    """
+    A durable job queue backed by SQLite.
+
+    Jobs survive API restarts: anything that was running when the process
+    stopped is put back in the queue by `requeue_running`. All methods are
+    blocking; call them with `asyncio.to_thread` from async code.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._initialized = True
+        return conn
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["request"] = json.loads(job["request"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def create(self, request: dict) -> dict:
+        """Adds a job to the queue and returns it."""
+        job_id = uuid.uuid4().hex
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at) VALUES (?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request), time.time()),
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row)
+
+    def claim_next(self) -> Optional[dict]:
+        """Atomically marks the oldest queued job as running and returns it."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                    (QUEUED,),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    "UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                    (RUNNING, time.time(), row["id"]),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return self.get(row["id"])
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> bool:
+        """Records the outcome of a running job. Returns False if it was cancelled."""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? "
+                "WHERE id = ? AND status = ?",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    time.time(),
+                    job_id,
+                    RUNNING,
+                ),
+            )
+        return cursor.rowcount == 1
+
+    def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancels a queued or running job and returns it."""
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+        return self.get(job_id)
+
+    def requeue_running(self) -> int:
+        """Puts jobs interrupted by a restart back in the queue."""
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, started_at = NULL WHERE status = ?",
+                (QUEUED, RUNNING),
+            )
+        return cursor.rowcount
+
+    def metrics(self, window: int = 1000) -> dict:
+        """Returns job counts by status and queue-wait stats of recent jobs."""
+        with closing(self._connect()) as conn:
+            counts = {
+                row["status"]: row["n"]
+                for row in conn.execute(
+                    "SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"
+                )
+            }
+            waits = sorted(
+                row["wait"]
+                for row in conn.execute(
+                    "SELECT started_at - created_at AS wait FROM jobs "
+                    "WHERE started_at IS NOT NULL ORDER BY started_at DESC LIMIT ?",
+                    (window,),
+                )
+            )
+            oldest = conn.execute(
+                "SELECT MIN(created_at) AS t FROM jobs WHERE status = ?", (QUEUED,)
+            ).fetchone()["t"]
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(int(p * len(waits)), len(waits) - 1)], 4)
+
+        return {
+            "counts": counts,
+            "queue_wait_seconds": {
+                "samples": len(waits),
+                "mean": round(sum(waits) / len(waits), 4) if waits else None,
+                "p50": percentile(0.50),
+                "p95": percentile(0.95),
+                "max": round(waits[-1], 4) if waits else None,
+            },
+            "oldest_queued_age_seconds": (
+                round(time.time() - oldest, 4) if oldest is not None else None
+            ),
+        }
+
+
+class JobRunner:
+    """
+    Worker tasks that drain a `JobStore` at a fixed concurrency.
+
+    Workers are woken when a job is submitted in this process, and otherwise
+    poll the store, so jobs left over from a previous run are picked up too.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[dict], Awaitable[dict]],
+        concurrency: int = 1,
+        poll_interval: float = 1.0,
+    ):
+        self.store = store
+        self.handler = handler
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+
+    async def start(self):
+        """Re-queues interrupted jobs and starts the workers."""
+        if self._workers:
+            return
+        requeued = await asyncio.to_thread(self.store.requeue_running)
+        if requeued:
+            logger.info(f"Re-queued {requeued} jobs interrupted by a restart.")
+        self._wakeup = asyncio.Event()
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        """Stops the workers. Running jobs are re-queued on the next start."""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self, request: dict) -> dict:
+        """Persists a new job and wakes up a worker."""
+        job = await asyncio.to_thread(self.store.create, request)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[dict]:
+        """Cancels a job, interrupting it if it is running in this process."""
+        job = await asyncio.to_thread(self.store.cancel, job_id)
+        task = self._running.get(job_id)
+        if task is not None and job is not None and job["status"] == CANCELLED:
+            task.cancel()
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await asyncio.to_thread(self.store.claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self.poll_interval
+                    )
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: dict):
+        job_id = job["id"]
+        task = asyncio.create_task(self.handler(job["request"]))
+        self._running[job_id] = task
+        try:
+            result = await task
+            status, error = SUCCEEDED, None
+        except asyncio.CancelledError:
+            if not task.cancelled():
+                # The worker itself is being stopped.
+                task.cancel()
+                raise
+            logger.info(f"Job {job_id} was cancelled.")
+            return
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {e}")
+            result, status, error = None, FAILED, str(e) or type(e).__name__
+        finally:
+            self._running.pop(job_id, None)
+        await asyncio.to_thread(self.store.finish, job_id, status, result, error)
+
+
+job_store = JobStore(
+    settings.JOBS_DB_PATH or os.path.join(settings.OUTPUT_DIR, "jobs.db")
+)
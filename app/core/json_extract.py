@@ -0,0 +1,134 @@
+import json
+import re
+from typing import List, Optional
+
+# Characters that matter inside an object but outside a string.
+_STRUCTURAL = re.compile(r'[{}"]')
+
+DEFAULT_MAX_SIZE = 1024 * 1024
+# How many times a candidate that isn't valid JSON is re-scanned for an inner object.
+_MAX_RESCANS = 32
+
+
+class JSONObjectExtractor:
+    """
+    An incremental extractor for the first JSON object embedded in text.
+
+    Text is fed in chunks (e.g. straight from a streaming LLM response). A
+    brace- and string-aware state machine finds the first balanced `{...}`
+    and parses it, so braces inside strings and stray braces in the
+    surrounding prose are handled. Only the current candidate object is kept
+    in memory, and candidates longer than `max_size` characters are skipped.
+    Long strings (like base64 data) are skipped with `str.find` rather than a
+    per-character loop.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE, _rescans: int = 0):
+        self.max_size = max_size
+        self.result: Optional[dict] = None
+        # Number of balanced candidates skipped because they were too large.
+        self.oversized = 0
+        self._rescans = _rescans
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._parts: List[str] = []
+        self._size = 0
+        self._keep = True
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def feed(self, chunk: str) -> Optional[dict]:
+        """Scans the next chunk and returns the object once it is complete."""
+        if self.result is not None:
+            return self.result
+
+        pos, end = 0, len(chunk)
+        start = 0  # Where the current candidate starts within this chunk.
+        while pos < end:
+            if self._depth == 0:
+                pos = chunk.find("{", pos)
+                if pos < 0:
+                    return None
+                start = pos
+                pos += 1
+                self._depth = 1
+                self._parts, self._size, self._keep = [], 0, True
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    pos += 1
+                    continue
+                # str.find is much faster than a regex on long base64 strings.
+                quote = chunk.find('"', pos)
+                backslash = chunk.find("\\", pos, end if quote < 0 else quote)
+                if backslash >= 0:
+                    self._escape = True
+                    pos = backslash + 1
+                elif quote >= 0:
+                    self._in_string = False
+                    pos = quote + 1
+                else:
+                    pos = end
+                    break
+                continue
+
+            match = _STRUCTURAL.search(chunk, pos)
+            if match is None:
+                pos = end
+                break
+            pos = match.end()
+            char = match.group()
+            if char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            else:
+                self._depth -= 1
+                if self._depth == 0:
+                    result = self._close(chunk[start:pos])
+                    if result is not None:
+                        self.result = result
+                        return result
+
+        if self._depth > 0:
+            self._append(chunk[start:])
+        return None
+
+    def _append(self, text: str):
+        if not self._keep:
+            return
+        self._size += len(text)
+        if self._size > self.max_size:
+            # Keep tracking braces, but stop buffering the oversized object.
+            self._parts, self._keep = [], False
+        else:
+            self._parts.append(text)
+
+    def _close(self, tail: str) -> Optional[dict]:
+        self._append(tail)
+        if not self._keep:
+            self.oversized += 1
+            return None
+        candidate = "".join(self._parts)
+        self._parts, self._size = [], 0
+        try:
+            result = json.loads(candidate)
+        except json.JSONDecodeError:
+            result = None
+        if isinstance(result, dict):
+            return result
+        # e.g. "{ {"a": 1} }": the object may be nested inside stray braces.
+        if self._rescans < _MAX_RESCANS and "{" in candidate[1:]:
+            inner = JSONObjectExtractor(self.max_size, _rescans=self._rescans + 1)
+            return inner.feed(candidate[1:])
+        return None
+
+
+def extract_json_object(text: str, max_size: int = DEFAULT_MAX_SIZE) -> Optional[dict]:
+    """Finds and parses the first valid JSON object within a string."""
+    return JSONObjectExtractor(max_size).feed(text)
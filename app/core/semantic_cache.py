@@ -0,0 +1,141 @@
+import hashlib
+import logging
+import math
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Lowercases, collapses whitespace and strips trailing punctuation."""
+    return " ".join(text.lower().split()).strip(" .!?")
+
+
+def cosine_similarity(a: List[float], b: List[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class HashingEmbeddings:
+    """
+    A lightweight, dependency-free stand-in for an embedding model.
+
+    Words are hashed into a fixed-size bag-of-words vector. It only captures
+    word overlap, which is enough for near-duplicate matching in tests and
+    when no embedding model is available.
+    """
+
+    def __init__(self, dimensions: int = 256):
+        self.dimensions = dimensions
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            vector[int.from_bytes(digest[:4], "little") % self.dimensions] += 1.0
+        return vector
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.embed_query(text)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    embedding: Optional[List[float]]
+    expires_at: float
+
+
+class SemanticCache:
+    """
+    A TTL- and LRU-bounded cache keyed by text.
+
+    Lookups first match the exact normalized text, then fall back to the most
+    similar cached text by embedding cosine similarity, if it is above
+    `threshold`. `embeddings` is any object with an async `aembed_query`
+    method (e.g. LangChain's `OllamaEmbeddings`).
+    """
+
+    def __init__(
+        self,
+        embeddings: Optional[Any],
+        threshold: float = 0.92,
+        ttl: float = 3600.0,
+        max_entries: int = 256,
+    ):
+        self.embeddings = embeddings
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self.counters: Dict[str, int] = {"exact_hits": 0, "near_hits": 0, "misses": 0}
+
+    async def get_or_compute(
+        self,
+        text: str,
+        compute: Callable[[], Awaitable[Any]],
+        use_cache: bool = True,
+    ) -> Any:
+        """
+        Returns a cached value for `text`, or awaits `compute()` and caches it.
+        With `use_cache=False` the lookup is skipped but the fresh value is
+        still stored for later requests.
+        """
+        key = normalize_text(text)
+        self._expire()
+
+        if use_cache and key in self._entries:
+            self._entries.move_to_end(key)
+            self.counters["exact_hits"] += 1
+            return self._entries[key].value
+
+        embedding = await self._embed(key)
+        if use_cache and embedding is not None:
+            match = self._nearest(embedding)
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.counters["near_hits"] += 1
+                logger.info(f"Semantic cache hit: '{key}' ~ '{match}'")
+                return self._entries[match].value
+
+        self.counters["misses"] += 1
+        value = await compute()
+        self._entries[key] = _Entry(value, embedding, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def stats(self) -> dict:
+        self._expire()
+        return {**self.counters, "entries": len(self._entries)}
+
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        if self.embeddings is None:
+            return None
+        try:
+            return await self.embeddings.aembed_query(text)
+        except Exception as e:
+            # The cache still works on exact matches without embeddings.
+            logger.warning(f"Could not embed text for the semantic cache: {e}")
+            return None
+
+    def _nearest(self, embedding: List[float]) -> Optional[str]:
+        best_key, best_score = None, self.threshold
+        for key, entry in self._entries.items():
+            if entry.embedding is None:
+                continue
+            score = cosine_similarity(embedding, entry.embedding)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def _expire(self):
+        now = time.monotonic()
+        for key in [k for k, e in self._entries.items() if e.expires_at <= now]:
+            del self._entries[key]
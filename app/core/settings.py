@@ -10,6 +10,34 @@ class Settings(BaseSettings):
     # ✅ Ensures it uses the correct 'ollama' service name
     OLLAMA_URL: str = "http://ollama:11434"
     FAST_MODE: bool = True
+    # Max number of uncollected tool results kept in memory
+    ARTIFACT_STORE_MAX_ITEMS: int = 256
+    # A1111 client and GPU job queue
+    A1111_REQUEST_TIMEOUT: float = 180.0
+    A1111_MAX_CONNECTIONS: int = 8
+    A1111_CONCURRENCY: int = 1
+    A1111_QUEUE_DEPTH: int = 16
+    A1111_QUEUE_TIMEOUT: float = 300.0
+    # Max images per batched A1111 request in /agent/generate_batch
+    A1111_MAX_BATCH_SIZE: int = 8
+    # How often the streaming endpoint polls A1111 for progress, in seconds
+    A1111_PROGRESS_INTERVAL: float = 1.0
+    # Content-addressed cache for fixed-seed generations (stored under OUTPUT_DIR/cache)
+    GENERATION_CACHE_MEMORY_BYTES: int = 64 * 1024 * 1024
+    GENERATION_CACHE_DISK_BYTES: int = 2 * 1024 * 1024 * 1024
+    # Durable job queue for /jobs (defaults to OUTPUT_DIR/jobs.db)
+    JOBS_DB_PATH: str = ""
+    JOBS_CONCURRENCY: int = 2
+    JOBS_POLL_INTERVAL: float = 1.0
+    # Largest JSON object (in characters) extracted from LLM output
+    JSON_EXTRACT_MAX_SIZE: int = 1024 * 1024
+    # Semantic cache for /agent/variations.
+    # IDEATION_EMBEDDINGS: "ollama", "hashing" (local stand-in) or "none" (exact matches only)
+    IDEATION_EMBEDDINGS: str = "ollama"
+    OLLAMA_EMBEDDING_MODEL: str = "llama3.1:8b"
+    IDEATION_CACHE_SIMILARITY: float = 0.92
+    IDEATION_CACHE_TTL: float = 3600.0
+    IDEATION_CACHE_MAX_ENTRIES: int = 256
 
     class Config:
         env_file = ".env"
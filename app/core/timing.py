@@ -0,0 +1,25 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+
+class StageTimer:
+    """Records the wall-clock duration of each named stage of a request."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times the wrapped block and stores the duration in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 4)
+
+    def finish(self) -> Dict[str, float]:
+        """Adds the total elapsed time and returns all timings."""
+        self.timings["total"] = round(time.perf_counter() - self._start, 4)
+        return self.timings
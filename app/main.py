@@ -1,6 +1,9 @@
 import logging
 from fastapi import FastAPI
+from app.api.images import router as images_router
+from app.api.jobs import job_runner, router as jobs_router
 from app.api.routes import router as api_router
+from app.core.a1111 import a1111_client, generation_queue
 
 # --- Logging Configuration ---
 # Configure logging to output timestamp, level, and message
@@ -17,20 +20,28 @@ app = FastAPI(
     version="1.0.0",
 )
 
-# Include the API router
+# Include the API routers
 app.include_router(api_router)
+app.include_router(images_router)
+app.include_router(jobs_router)
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Log application startup"""
+    """Log application startup, open the shared A1111 client and start the workers."""
     logger.info("Lovart AI application starting up...")
+    await a1111_client.start()
+    await generation_queue.start()
+    await job_runner.start()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Log application shutdown"""
+    """Log application shutdown, stop the workers and release the A1111 connection pool."""
     logger.info("Lovart AI application shutting down...")
+    await job_runner.stop()
+    await generation_queue.stop()
+    await a1111_client.close()
 
 
 @app.get("/", tags=["Root"])
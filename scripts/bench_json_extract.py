@@ -0,0 +1,78 @@
+"""
+Micro-benchmark for extracting the tool JSON from agent output.
+
+Compares the old greedy `\\{.*\\}` regex with `JSONObjectExtractor` on
+realistic 1-5 MB agent outputs (prose, a JSON object with a base64 image,
+and trailing text with stray braces), both on the whole string and fed in
+streaming-sized chunks.
+
+Usage: python -m scripts.bench_json_extract [--repeat N]
+"""
+
+import argparse
+import base64
+import json
+import os
+import re
+import timeit
+
+from app.core.json_extract import JSONObjectExtractor, extract_json_object
+
+
+def old_extract(text: str):
+    """The previous implementation from app/api/routes.py."""
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        try:
+            return json.loads(match.group(0))
+        except json.JSONDecodeError:
+            return None
+    return None
+
+
+def make_output(size_mb: int) -> str:
+    """Builds an agent output holding a base64 image of roughly `size_mb` MB."""
+    image = base64.b64encode(os.urandom(size_mb * 1024 * 1024 * 3 // 4)).decode()
+    tool_output = json.dumps(
+        {"image_base64": image, "final_prompt": "a fox", "saved_path": "x.png"}
+    )
+    return (
+        f"Sure! Here is the result:\n{tool_output}\nLet me know {{if}} you need more."
+    )
+
+
+def feed_chunks(text: str, chunk_size: int = 4096):
+    extractor = JSONObjectExtractor(max_size=len(text))
+    for i in range(0, len(text), chunk_size):
+        if extractor.feed(text[i : i + chunk_size]) is not None:
+            break
+    return extractor.result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'size':>6} {'old regex':>12} {'extractor':>12} {'chunked':>12}")
+    for size_mb in (1, 2, 5):
+        text = make_output(size_mb)
+        cases = {
+            "old regex": lambda: old_extract(text),
+            "extractor": lambda: extract_json_object(text, max_size=len(text)),
+            "chunked": lambda: feed_chunks(text),
+        }
+        # The trailing "{if}" makes the old regex over-match and fail to parse.
+        timings = {}
+        for name, func in cases.items():
+            best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+            timings[name] = f"{best * 1000:.1f} ms" + ("" if func() else " (x)")
+        print(
+            f"{size_mb:>4}MB {timings['old regex']:>12} "
+            f"{timings['extractor']:>12} {timings['chunked']:>12}"
+        )
+    print("(x) = no object extracted")
+
+
+if __name__ == "__main__":
+    main()
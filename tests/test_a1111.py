@@ -0,0 +1,54 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.a1111 import A1111Client, GenerationQueue, QueueFullError
+
+
+def make_client(handler):
+    return A1111Client("http://a1111", transport=httpx.MockTransport(handler))
+
+
+def test_queue_returns_a1111_response():
+    """Tests that a queued job is sent to txt2img and its result returned."""
+
+    def handler(request):
+        assert request.url.path == "/sdapi/v1/txt2img"
+        return httpx.Response(200, json={"images": ["aW1n"]})
+
+    async def run():
+        queue = GenerationQueue(make_client(handler))
+        try:
+            return await queue.submit({"prompt": "fox"})
+        finally:
+            await queue.stop()
+
+    assert asyncio.run(run()) == {"images": ["aW1n"]}
+
+
+def test_queue_rejects_jobs_when_full():
+    """Tests that callers fail fast once the queue is at max depth."""
+
+    async def run():
+        release = asyncio.Event()
+
+        async def slow_txt2img(payload):
+            await release.wait()
+            return {"images": []}
+
+        client = make_client(lambda request: httpx.Response(200, json={}))
+        client.txt2img = slow_txt2img
+        queue = GenerationQueue(client, concurrency=1, max_depth=1)
+        try:
+            running = await queue.enqueue({"n": 1})
+            await running.started.wait()
+            await queue.enqueue({"n": 2})
+            with pytest.raises(QueueFullError):
+                await queue.enqueue({"n": 3})
+            release.set()
+            await queue.wait(running)
+        finally:
+            await queue.stop()
+
+    asyncio.run(run())
@@ -8,3 +8,165 @@ def test_read_root():
     response = client.get("/")
     assert response.status_code == 200
     assert response.json() == {"status": "Lovart AI API is running."}
+
+
+def test_agent_generate_resolves_artifact(monkeypatch):
+    """Tests that the route resolves the tool's artifact handle itself."""
+    from types import SimpleNamespace
+
+    from app.agent import pipeline
+    from app.core.artifacts import artifact_store
+
+    artifact_id = artifact_store.put(
+        {"image_id": "img1", "final_prompt": "refined", "saved_path": "img1.png"}
+    )
+    observation = f'{{"artifact_id": "{artifact_id}", "final_prompt": "refined"}}'
+
+    async def fake_ainvoke(inputs):
+        return {
+            "output": "done",
+            "intermediate_steps": [
+                (SimpleNamespace(tool="generate_image"), observation)
+            ],
+        }
+
+    monkeypatch.setattr(
+        pipeline, "agent_executor", SimpleNamespace(ainvoke=fake_ainvoke)
+    )
+    response = client.post("/agent/generate", json={"prompt": "fox"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["image_url"] == "/images/img1"
+    assert body["image_base64"] is None
+    assert body["final_prompt"] == "refined"
+    assert "agent" in body["timings"]
+
+
+def test_agent_generate_direct_mode_skips_llm(monkeypatch):
+    """Tests that direct mode sends the prompt to A1111 without the LLM."""
+    from types import SimpleNamespace
+
+    from app.agent import pipeline
+
+    async def fail_ainvoke(inputs):
+        raise AssertionError("The LLM must not be called in direct mode.")
+
+    async def fake_txt2img(tool_input):
+        return {"image_id": "img1", "final_prompt": tool_input.prompt}
+
+    monkeypatch.setattr(
+        pipeline, "agent_executor", SimpleNamespace(ainvoke=fail_ainvoke)
+    )
+    monkeypatch.setattr(pipeline, "run_txt2img", fake_txt2img)
+    response = client.post(
+        "/agent/generate", json={"prompt": "a fox", "mode": "direct"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["final_prompt"] == "a fox"
+    assert set(body["timings"]) == {"generate", "total"}
+
+
+def test_agent_generate_refine_mode(monkeypatch):
+    """Tests that refine mode generates from the refined prompt."""
+    from types import SimpleNamespace
+
+    from app.agent import pipeline
+    from app.agent.refiner import RefinedPrompt
+
+    async def fake_refine(inputs):
+        return RefinedPrompt(prompt=f"{inputs['user_prompt']}, golden hour")
+
+    async def fake_txt2img(tool_input):
+        return {"image_id": "img1", "final_prompt": tool_input.prompt}
+
+    monkeypatch.setattr(
+        pipeline, "refinement_chain", SimpleNamespace(ainvoke=fake_refine)
+    )
+    monkeypatch.setattr(pipeline, "run_txt2img", fake_txt2img)
+    response = client.post(
+        "/agent/generate", json={"prompt": "a fox", "mode": "refine"}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["final_prompt"] == "a fox, golden hour"
+    assert {"refine", "generate", "total"} <= set(body["timings"])
+
+
+def test_agent_generate_returns_503_when_gpu_queue_is_full(monkeypatch):
+    """Tests that a saturated GPU queue is reported as 503 right away."""
+    from app.agent import pipeline
+    from app.core.a1111 import QueueFullError
+
+    async def fake_txt2img(tool_input):
+        raise QueueFullError("The image generation queue is full.")
+
+    monkeypatch.setattr(pipeline, "run_txt2img", fake_txt2img)
+    response = client.post(
+        "/agent/generate", json={"prompt": "a fox", "mode": "direct"}
+    )
+    assert response.status_code == 503
+    assert "Retry-After" in response.headers
+
+
+def test_agent_generate_batch_streams_each_image(monkeypatch, tmp_path):
+    """Tests that a batch is sent as one A1111 request and streamed per image."""
+    import json
+
+    from app.api import routes
+
+    calls = []
+
+    async def fake_txt2img(payload):
+        calls.append(payload)
+        return {"images": ["aW1n", "aW1nMg=="]}
+
+    monkeypatch.setattr(routes.generation_queue.client, "txt2img", fake_txt2img)
+    monkeypatch.setattr(routes.settings, "OUTPUT_DIR", str(tmp_path))
+    response = client.post(
+        "/agent/generate_batch", json={"prompts": ["a fox", "an owl"]}
+    )
+    assert response.status_code == 200
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert len(calls) == 1
+    assert sorted(line["index"] for line in lines) == [0, 1]
+    assert all(client.get(line["image_url"]).status_code == 200 for line in lines)
+
+
+def test_agent_generate_stream_emits_stage_events(monkeypatch, tmp_path):
+    """Tests that the SSE stream reports each stage before the final image."""
+    import asyncio
+    from types import SimpleNamespace
+
+    from app.api import routes
+
+    async def fake_astream(inputs):
+        for token in ["a fox", ", golden hour"]:
+            yield token
+
+    async def fake_txt2img(payload):
+        await asyncio.sleep(0.05)
+        return {"images": ["aW1n"]}
+
+    async def fake_progress():
+        return {"progress": 0.5, "eta_relative": 1.0, "current_image": "cHJl"}
+
+    monkeypatch.setattr(
+        routes, "refinement_text_chain", SimpleNamespace(astream=fake_astream)
+    )
+    monkeypatch.setattr(routes.generation_queue.client, "txt2img", fake_txt2img)
+    monkeypatch.setattr(routes.generation_queue.client, "progress", fake_progress)
+    monkeypatch.setattr(routes.settings, "A1111_PROGRESS_INTERVAL", 0.01)
+    monkeypatch.setattr(routes.settings, "OUTPUT_DIR", str(tmp_path))
+
+    response = client.post("/agent/generate/stream", json={"prompt": "a fox"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = [
+        line.split(": ", 1)[1]
+        for line in response.text.splitlines()
+        if line.startswith("event: ")
+    ]
+    assert events[:4] == ["token", "token", "prompt", "queued"]
+    assert "started" in events and "progress" in events
+    assert events[-1] == "done"
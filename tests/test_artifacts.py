@@ -0,0 +1,20 @@
+from app.core.artifacts import ArtifactStore
+
+
+def test_artifact_store_round_trip():
+    """Tests that an artifact can be resolved by its handle exactly once."""
+    store = ArtifactStore()
+    artifact_id = store.put({"image_base64": "abc"})
+    assert store.get(artifact_id) == {"image_base64": "abc"}
+    assert store.pop(artifact_id) == {"image_base64": "abc"}
+    assert store.pop(artifact_id) is None
+
+
+def test_artifact_store_is_bounded():
+    """Tests that the oldest uncollected artifacts are evicted."""
+    store = ArtifactStore(max_items=2)
+    first = store.put({"n": 1})
+    store.put({"n": 2})
+    store.put({"n": 3})
+    assert len(store) == 2
+    assert store.get(first) is None
@@ -0,0 +1,67 @@
+import asyncio
+from pathlib import Path
+
+from app.core.cache import GenerationCache
+
+
+def make_cache(tmp_path, max_memory_bytes=1024, max_disk_bytes=1024):
+    return GenerationCache(str(tmp_path), max_memory_bytes, max_disk_bytes)
+
+
+def test_random_seed_payloads_are_not_cached():
+    """Tests that only payloads with an explicit seed get a cache key."""
+    assert GenerationCache.key_for({"prompt": "fox", "seed": -1}) is None
+    assert GenerationCache.key_for({"prompt": "fox"}) is None
+    assert GenerationCache.key_for(
+        {"prompt": "a  fox", "seed": 1}
+    ) == GenerationCache.key_for({"seed": 1, "prompt": "a fox"})
+
+
+def test_cache_hits_memory_then_disk(tmp_path):
+    """Tests that entries survive in the disk tier after a restart."""
+    key = GenerationCache.key_for({"prompt": "fox", "seed": 7})
+    cache = make_cache(tmp_path)
+    assert cache.get(key) is None
+    cache.put(key, b"png")
+    assert cache.get(key) == b"png"
+
+    restarted = make_cache(tmp_path)
+    assert restarted.get(key) == b"png"
+    assert restarted.stats()["disk_hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["memory_hits"] == 1
+
+
+def test_cache_evicts_by_size(tmp_path):
+    """Tests that the oldest entries are evicted when a tier is full."""
+    cache = make_cache(tmp_path, max_memory_bytes=10, max_disk_bytes=10)
+    cache.put("a", b"123456")
+    cache.put("b", b"123456")
+    stats = cache.stats()
+    assert stats["memory_entries"] == 1
+    assert stats["disk_entries"] == 1
+    assert stats["evictions"] == 1
+    assert not (tmp_path / "a.png").exists()
+
+
+def test_run_txt2img_serves_repeats_from_cache(monkeypatch, tmp_path):
+    """Tests that a repeated fixed-seed generation doesn't call A1111."""
+    from app.agent import tools
+
+    calls = []
+
+    async def fake_submit(payload):
+        calls.append(payload)
+        return {"images": ["aW1n"]}
+
+    monkeypatch.setattr(tools.generation_queue, "submit", fake_submit)
+    monkeypatch.setattr(tools.settings, "OUTPUT_DIR", str(tmp_path))
+    monkeypatch.setattr(tools, "generation_cache", make_cache(tmp_path / "cache"))
+
+    tool_input = tools.ImageGeneratorInput(prompt="fox", seed=42)
+    first = asyncio.run(tools.run_txt2img(tool_input))
+    second = asyncio.run(tools.run_txt2img(tool_input))
+    assert len(calls) == 1
+    assert second["final_prompt"] == first["final_prompt"]
+    first_bytes = Path(first["saved_path"]).read_bytes()
+    assert Path(second["saved_path"]).read_bytes() == first_bytes
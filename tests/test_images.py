@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+
+from app.api import images
+from app.main import app
+
+client = TestClient(app)
+
+PNG_BYTES = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+def write_image(monkeypatch, tmp_path, image_id="img1"):
+    monkeypatch.setattr(images.settings, "OUTPUT_DIR", str(tmp_path))
+    (tmp_path / f"{image_id}.png").write_bytes(PNG_BYTES)
+    return images.image_url(image_id)
+
+
+def test_get_image_serves_file_with_cache_headers(monkeypatch, tmp_path):
+    """Tests that images are served as PNG files with long-lived caching."""
+    url = write_image(monkeypatch, tmp_path)
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.content == PNG_BYTES
+    assert response.headers["content-type"] == "image/png"
+    assert "immutable" in response.headers["cache-control"]
+
+    etag = response.headers["etag"]
+    cached = client.get(url, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+
+
+def test_get_image_supports_ranges(monkeypatch, tmp_path):
+    """Tests single byte ranges, suffix ranges and unsatisfiable ranges."""
+    url = write_image(monkeypatch, tmp_path)
+    partial = client.get(url, headers={"Range": "bytes=8-15"})
+    assert partial.status_code == 206
+    assert partial.content == PNG_BYTES[8:16]
+    assert partial.headers["content-range"] == f"bytes 8-15/{len(PNG_BYTES)}"
+
+    suffix = client.get(url, headers={"Range": "bytes=-4"})
+    assert suffix.content == PNG_BYTES[-4:]
+
+    invalid = client.get(url, headers={"Range": f"bytes={len(PNG_BYTES)}-"})
+    assert invalid.status_code == 416
+
+
+def test_get_image_rejects_unknown_and_unsafe_ids(monkeypatch, tmp_path):
+    """Tests that only image IDs in OUTPUT_DIR can be served."""
+    write_image(monkeypatch, tmp_path)
+    assert client.get("/images/missing").status_code == 404
+    assert client.get("/images/..%2Fsecret").status_code == 404
@@ -0,0 +1,73 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core.jobs import CANCELLED, QUEUED, RUNNING, SUCCEEDED, JobRunner, JobStore
+from app.main import app
+
+client = TestClient(app)
+
+
+def test_job_store_survives_restarts(tmp_path):
+    """Tests that jobs interrupted mid-run are queued again on restart."""
+    store = JobStore(str(tmp_path / "jobs.db"))
+    job = store.create({"prompt": "a fox"})
+    assert job["status"] == QUEUED
+    assert store.claim_next()["status"] == RUNNING
+    assert store.claim_next() is None
+
+    restarted = JobStore(str(tmp_path / "jobs.db"))
+    assert restarted.requeue_running() == 1
+    assert restarted.claim_next()["id"] == job["id"]
+    assert restarted.finish(job["id"], SUCCEEDED, result={"image_id": "img1"})
+    assert restarted.get(job["id"])["result"] == {"image_id": "img1"}
+    assert restarted.metrics()["queue_wait_seconds"]["samples"] == 1
+
+
+def test_job_runner_runs_and_cancels_jobs(tmp_path):
+    """Tests that workers drain the queue and running jobs can be cancelled."""
+    store = JobStore(str(tmp_path / "jobs.db"))
+
+    async def handler(request):
+        if request["prompt"] == "slow":
+            await asyncio.sleep(60)
+        return {"final_prompt": request["prompt"]}
+
+    async def wait_for_status(job_id, status):
+        while store.get(job_id)["status"] != status:
+            await asyncio.sleep(0.01)
+
+    async def run():
+        runner = JobRunner(store, handler, concurrency=2, poll_interval=0.05)
+        await runner.start()
+        try:
+            fast = await runner.submit({"prompt": "fast"})
+            slow = await runner.submit({"prompt": "slow"})
+            await asyncio.wait_for(wait_for_status(fast["id"], SUCCEEDED), 5)
+            await asyncio.wait_for(wait_for_status(slow["id"], RUNNING), 5)
+            assert (await runner.cancel(slow["id"]))["status"] == CANCELLED
+        finally:
+            await runner.stop()
+        return store.get(fast["id"]), store.get(slow["id"])
+
+    fast, slow = asyncio.run(run())
+    assert fast["result"] == {"final_prompt": "fast"}
+    assert slow["status"] == CANCELLED
+
+
+def test_jobs_api(monkeypatch, tmp_path):
+    """Tests that POST /jobs returns right away and the job can be polled."""
+    from app.api import jobs
+
+    store = JobStore(str(tmp_path / "jobs.db"))
+    monkeypatch.setattr(jobs, "job_store", store)
+    monkeypatch.setattr(jobs.job_runner, "store", store)
+
+    response = client.post("/jobs", json={"prompt": "a fox", "mode": "direct"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    assert client.get(f"/jobs/{job_id}").json()["status"] == QUEUED
+    assert client.post(f"/jobs/{job_id}/cancel").json()["status"] == CANCELLED
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/metrics").json()["counts"] == {CANCELLED: 1}
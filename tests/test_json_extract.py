@@ -0,0 +1,31 @@
+from app.core.json_extract import JSONObjectExtractor, extract_json_object
+
+
+def test_extracts_first_object_from_prose():
+    """Tests that surrounding text and braces inside strings are ignored."""
+    text = 'Here you go: {"final_prompt": "a {curly} fox", "n": 1} and {"n": 2}'
+    assert extract_json_object(text) == {"final_prompt": "a {curly} fox", "n": 1}
+
+
+def test_skips_stray_braces_around_the_object():
+    """Tests the cases that broke the old greedy regex."""
+    assert extract_json_object('{note} result: {"a": 1} {end}') == {"a": 1}
+    assert extract_json_object('{ {"a": "x\\"}"} }') == {"a": 'x"}'}
+    assert extract_json_object("no json here") is None
+
+
+def test_feeds_chunks_incrementally():
+    """Tests that objects split across chunks, even mid-escape, are found."""
+    text = 'prefix {"a": "b\\"c", "d": {"e": [1, 2]}} suffix'
+    extractor = JSONObjectExtractor()
+    results = [extractor.feed(text[i : i + 3]) for i in range(0, len(text), 3)]
+    assert results[-1] == {"a": 'b"c', "d": {"e": [1, 2]}}
+    assert extractor.done
+
+
+def test_skips_objects_over_max_size():
+    """Tests that oversized candidates are not buffered or parsed."""
+    text = '{"image": "' + "A" * 1000 + '"} {"ok": true}'
+    extractor = JSONObjectExtractor(max_size=100)
+    assert extractor.feed(text) == {"ok": True}
+    assert extractor.oversized == 1
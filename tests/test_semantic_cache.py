@@ -0,0 +1,52 @@
+import asyncio
+
+from app.core.semantic_cache import HashingEmbeddings, SemanticCache
+
+
+def run_lookups(cache, ideas, use_cache=True):
+    calls = []
+
+    async def lookup(idea):
+        async def compute():
+            calls.append(idea)
+            return {"variations": [idea]}
+
+        return await cache.get_or_compute(idea, compute, use_cache=use_cache)
+
+    async def run():
+        return [await lookup(idea) for idea in ideas]
+
+    return asyncio.run(run()), calls
+
+
+def test_exact_and_near_duplicate_ideas_hit_the_cache():
+    """Tests that normalized and near-duplicate ideas reuse the first result."""
+    cache = SemanticCache(HashingEmbeddings())
+    results, calls = run_lookups(
+        cache,
+        [
+            "A cat wearing a wizard hat",
+            "a cat  wearing a wizard hat!",
+            "a cat wearing a wizard hat today",
+            "a dog riding a bicycle",
+        ],
+    )
+    assert calls == ["A cat wearing a wizard hat", "a dog riding a bicycle"]
+    assert results[2] == results[0]
+    assert cache.stats() == {
+        "exact_hits": 1,
+        "near_hits": 1,
+        "misses": 2,
+        "entries": 2,
+    }
+
+
+def test_cache_respects_ttl_and_opt_out():
+    """Tests that expired entries and opted-out requests call the LLM again."""
+    expired = SemanticCache(HashingEmbeddings(), ttl=0)
+    _, calls = run_lookups(expired, ["a fox", "a fox"])
+    assert len(calls) == 2
+
+    cache = SemanticCache(HashingEmbeddings())
+    _, calls = run_lookups(cache, ["a fox", "a fox"], use_cache=False)
+    assert len(calls) == 2
@@ -4,3 +4,50 @@ from langchain_core.tools import BaseTool
 def test_generate_image_is_tool():
     """Tests that the generate_image function is a LangChain tool."""
     assert isinstance(generate_image, BaseTool)
+
+
+def test_generate_image_returns_artifact_handle(monkeypatch, tmp_path):
+    """Tests that the tool keeps image data out of its output."""
+    import asyncio
+    import base64
+    import json
+
+    from app.agent import tools
+    from app.core.artifacts import artifact_store
+
+    image_base64 = base64.b64encode(b"png-bytes" * 1000).decode()
+
+    async def fake_submit(payload):
+        return {"images": [image_base64]}
+
+    monkeypatch.setattr(tools.generation_queue, "submit", fake_submit)
+    monkeypatch.setattr(tools.settings, "OUTPUT_DIR", str(tmp_path))
+
+    output = asyncio.run(generate_image.ainvoke({"prompt": "a red fox"}))
+    assert image_base64 not in output
+
+    artifact = artifact_store.pop(json.loads(output)["artifact_id"])
+    assert artifact["final_prompt"] == "a red fox"
+    saved = tmp_path / f"{artifact['image_id']}.png"
+    assert saved.read_bytes() == base64.b64decode(image_base64)
+
+
+def test_build_batches_groups_compatible_payloads():
+    """Tests that prompts sharing settings are sent as one A1111 request."""
+    from app.agent.tools import PROMPTS_SCRIPT, build_batches
+
+    base = {"steps": 1, "width": 256, "height": 256, "sampler_name": "Euler"}
+    payloads = [
+        dict(base, prompt="a fox"),
+        dict(base, prompt="an owl", width=512),
+        dict(base, prompt="a cat"),
+    ]
+    batches = build_batches(payloads, max_batch_size=8)
+    assert [indices for indices, _ in batches] == [[0, 2], [1]]
+
+    indices, batch_payload = batches[0]
+    assert batch_payload["script_name"] == PROMPTS_SCRIPT
+    assert batch_payload["script_args"][-1] == "a fox\na cat"
+
+    same = build_batches([dict(base, prompt="a fox")] * 3, max_batch_size=2)
+    assert [(i, p["batch_size"]) for i, p in same] == [([0, 1], 2), ([2], 1)]
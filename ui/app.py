@@ -1,8 +1,7 @@
 import streamlit as st
 import requests
 import base64
-from PIL import Image
-import io
+import json
 import textwrap
 import os
 
@@ -25,11 +24,15 @@ def get_prompt_variations(user_idea: str):
         return []
 
 
-def generate_image(prompt: str):
-    """Calls the backend to generate an image from a single prompt."""
+def generate_image(prompt: str, mode: str = "direct"):
+    """
+    Calls the backend to generate an image from a single prompt.
+    Variations are already refined by the ideation agent, so by default the
+    backend skips the LLM and sends them straight to A1111.
+    """
     try:
         response = requests.post(
-            f"{API_BASE_URL}/agent/generate", json={"prompt": prompt}
+            f"{API_BASE_URL}/agent/generate", json={"prompt": prompt, "mode": mode}
         )
         response.raise_for_status()
         return response.json()
@@ -38,6 +41,63 @@ def generate_image(prompt: str):
         return None
 
 
+def generate_images_batch(prompts: list):
+    """
+    Calls the backend to generate all prompts in as few A1111 requests as possible.
+    Yields each result (with its "index" in `prompts`) as soon as it is streamed back.
+    """
+    try:
+        with requests.post(
+            f"{API_BASE_URL}/agent/generate_batch",
+            json={"prompts": prompts},
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+    except requests.RequestException as e:
+        st.error(f"Error generating images: {e}")
+
+
+def stream_generation(prompt: str, mode: str = "refine"):
+    """
+    Calls the backend's streaming endpoint and yields `(event, data)` pairs
+    parsed from the Server-Sent Events as they arrive.
+    """
+    try:
+        with requests.post(
+            f"{API_BASE_URL}/agent/generate/stream",
+            json={"prompt": prompt, "mode": mode},
+            stream=True,
+        ) as response:
+            response.raise_for_status()
+            event = "message"
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("event: "):
+                    event = line[len("event: ") :]
+                elif line.startswith("data: "):
+                    yield event, json.loads(line[len("data: ") :])
+                    event = "message"
+    except requests.RequestException as e:
+        st.error(f"Error generating image: {e}")
+
+
+def fetch_image(image_url: str):
+    """
+    Downloads an image served by the backend. The browser can't reach the API
+    container directly, so the UI fetches the PNG bytes and hands them to
+    Streamlit as-is, without decoding them.
+    """
+    try:
+        response = requests.get(f"{API_BASE_URL}{image_url}")
+        response.raise_for_status()
+        return response.content
+    except requests.RequestException as e:
+        st.error(f"Error loading image: {e}")
+        return None
+
+
 # --- UI Layout ---
 st.title("🎨 AI Design Agent")
 st.markdown(
@@ -56,9 +116,49 @@ with st.form("idea_form"):
         placeholder="e.g., A cat wearing a wizard hat",
         key="user_idea_input",
     )
+    single_image = st.checkbox(
+        "Skip brainstorming: refine my prompt and generate a single image"
+    )
     submitted = st.form_submit_button("✨ Generate Concepts")
 
-if submitted and user_idea:
+if submitted and user_idea and single_image:
+    st.session_state.results = []  # Clear previous results
+
+    # Show each stage live as the backend streams it
+    status = st.empty()
+    refined_prompt = st.empty()
+    progress_bar = st.progress(0)
+    image_placeholder = st.empty()
+    tokens = []
+
+    status.info("Refining your prompt...")
+    for event, data in stream_generation(user_idea):
+        if event == "token":
+            tokens.append(data["text"])
+            refined_prompt.caption(f"**Prompt:** {''.join(tokens)}")
+        elif event == "prompt":
+            refined_prompt.caption(f"**Prompt:** {data['final_prompt']}")
+        elif event == "queued":
+            status.info(f"Queued ({data['queue_depth']} jobs waiting)...")
+        elif event == "started":
+            status.info("Generating...")
+        elif event == "progress":
+            progress_bar.progress(min(float(data.get("progress") or 0), 1.0))
+            if data.get("current_image"):
+                image_placeholder.image(
+                    base64.b64decode(data["current_image"]), use_container_width=True
+                )
+        elif event == "done":
+            st.session_state.results.append(data)
+            status.success(f"Done in {data['timings']['total']:.1f}s.")
+            progress_bar.progress(1.0)
+            image_bytes = fetch_image(data["image_url"])
+            if image_bytes:
+                image_placeholder.image(image_bytes, use_container_width=True)
+        elif event == "error":
+            status.error(f"Could not generate the image: {data['detail']}")
+
+elif submitted and user_idea:
     st.session_state.results = []  # Clear previous results
 
     # Step 1: Get prompt variations
@@ -79,39 +179,39 @@ if submitted and user_idea:
         # Placeholder container for results
         results_container = st.container()
 
+        # One placeholder per variation, filled in as the images stream back
+        placeholders = []
         for i in range(0, total_variations, max_cols):
             chunk = variations[i : i + max_cols]
             cols = results_container.columns(len(chunk))
-
-            for j, prompt_variation in enumerate(chunk):
+            for j in range(len(chunk)):
                 with cols[j]:
-                    placeholder = st.empty()  # Individual placeholder for live update
-                    with st.spinner(f"Concept {i+j+1}: Generating..."):
-                        result_data = generate_image(prompt_variation)
-                        if result_data and result_data.get("image_base64"):
-                            st.session_state.results.append(result_data)
-
-                            # Decode and display image immediately
-                            try:
-                                img_data = base64.b64decode(result_data["image_base64"])
-                                img = Image.open(io.BytesIO(img_data))
-                                placeholder.image(img, use_container_width=True)
-                                wrapped_prompt = textwrap.fill(
-                                    result_data.get(
-                                        "final_prompt", "Prompt not available."
-                                    ),
-                                    width=40,
-                                )
-                                placeholder.caption(f"**Prompt:** {wrapped_prompt}")
-                            except Exception as e:
-                                placeholder.error(
-                                    f"Could not display image. Error: {e}"
-                                )
-                        else:
-                            placeholder.warning(
-                                f"Concept {i+j+1} could not be generated."
-                            )
-
-                        # Update progress bar
-                        generated_count += 1
-                        progress_bar.progress(generated_count / total_variations)
+                    placeholder = st.empty()
+                    placeholder.info(f"Concept {i+j+1}: Generating...")
+                    placeholders.append(placeholder)
+
+        for result_data in generate_images_batch(variations):
+            index = result_data["index"]
+            placeholder = placeholders[index].container()
+            if result_data.get("image_url"):
+                st.session_state.results.append(result_data)
+
+                # Load and display image immediately
+                try:
+                    img_data = fetch_image(result_data["image_url"])
+                    placeholder.image(img_data, use_container_width=True)
+                    wrapped_prompt = textwrap.fill(
+                        result_data.get("final_prompt", "Prompt not available."),
+                        width=40,
+                    )
+                    placeholder.caption(f"**Prompt:** {wrapped_prompt}")
+                except Exception as e:
+                    placeholder.error(f"Could not display image. Error: {e}")
+            else:
+                placeholder.warning(
+                    f"Concept {index+1} could not be generated: {result_data.get('error')}"
+                )
+
+            # Update progress bar
+            generated_count += 1
+            progress_bar.progress(generated_count / total_variations)